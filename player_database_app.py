@@ -1,11 +1,19 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import date, timedelta
+import importlib.util
 import os
+import posixpath
 import uuid
-from io import BytesIO, StringIO
+from html import escape
+import hashlib
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from base64 import b64encode, b64decode
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from base64 import b64encode
 
 # -------------------------
 # CONFIG & CONSTANTS
@@ -34,6 +42,9 @@ PLAYER_COLUMNS = [
     "photo_file",
 ]
 
+# Built by the players loader from the columns above; never saved
+DERIVED_PLAYER_COLUMNS = ["display", "full_name"]
+
 RESULT_COLUMNS = [
     "result_id",
     "player_id",
@@ -47,10 +58,25 @@ RESULT_COLUMNS = [
     "prize_money",
 ]
 
+# Free-text result columns; everything else is parsed as numbers/dates
+RESULT_TEXT_COLUMNS = ["result_id", "player_id", "season", "event_type", "tournament_name", "teammate"]
+
+# Fields a teammate's mirrored copy of a result shares with the original
+MIRROR_KEY_COLUMNS = ["season", "date", "event_type", "tournament_name", "points", "rank", "prize_money"]
+
 EVENT_TYPES = ["AVC", "FIVB", "AVC Multi/Zonal", "Other Multi/Zonal"]
 
 GENDER_OPTIONS = ["", "Male", "Female"]  # "" = not specified
 
+# Results tables: show datetime64 dates without the time part
+RESULT_COLUMN_CONFIG = {"date": st.column_config.DateColumn("date", format="YYYY-MM-DD")}
+
+# Results tables ship at most this many rows to the browser per rerun
+MAX_DISPLAY_ROWS = 200
+
+# Rust-based xlsx reader when installed (pandas >= 2.2), else openpyxl
+EXCEL_ENGINE = "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
 # -------------------------
 # GITHUB STORAGE CONFIG
 # -------------------------
@@ -70,6 +96,29 @@ try:
 except Exception:
     USE_GITHUB = False
 
+# The script re-runs on every interaction, so process-wide state lives in
+# st.cache_resource; the module names below just point at it each run.
+
+
+@st.cache_resource(show_spinner=False)
+def github_session():
+    """One pooled session so TCP/TLS connections to api.github.com are
+       reused across reruns.
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+
+@st.cache_resource(show_spinner=False)
+def github_sha_cache():
+    """Last known blob sha per repo path (filled by reads and writes)."""
+    return {}
+
+
+GH_SESSION = github_session()
+_GH_SHA_CACHE = github_sha_cache()
+
 
 def github_headers():
     return {
@@ -78,6 +127,13 @@ def github_headers():
     }
 
 
+def git_blob_sha(content) -> str:
+    """The sha git (and the contents API) reports for a file with this content."""
+    digest = hashlib.sha1(b"blob %d\0" % len(content))
+    digest.update(content)
+    return digest.hexdigest()
+
+
 def github_get_file(path: str):
     """Get a file from GitHub repo via contents API.
        Returns (bytes_content, sha) or (None, None) if not found/error.
@@ -91,42 +147,183 @@ def github_get_file(path: str):
     if GH_BRANCH:
         params["ref"] = GH_BRANCH
 
-    resp = requests.get(url, headers=github_headers(), params=params)
+    # Raw media type: the body is the file itself (no JSON/base64 round trip,
+    # and no 1MB limit); the sha is recomputed locally from the bytes
+    headers = {**github_headers(), "Accept": "application/vnd.github.raw"}
+    resp = GH_SESSION.get(url, headers=headers, params=params)
     if resp.status_code == 200:
-        data = resp.json()
-        content = b64decode(data["content"])
-        sha = data["sha"]
+        content = resp.content
+        sha = git_blob_sha(content)
+        _GH_SHA_CACHE[path] = sha
         return content, sha
     elif resp.status_code == 404:
+        _GH_SHA_CACHE.pop(path, None)
         return None, None
     else:
         st.error(f"GitHub read error for {path}: {resp.status_code} {resp.text}")
         return None, None
 
 
-def github_put_file(path: str, content_bytes: bytes, message: str):
-    """Create or update a file in the GitHub repo."""
+def github_dir_shas(parent: str):
+    """{file name: blob sha} for one repo directory from a single listing
+       (also refreshes the sha cache). {} if the directory does not exist,
+       None on error.
+    """
+    if not USE_GITHUB:
+        return None
+
+    parent = parent.replace("\\", "/")
+    url = f"https://api.github.com/repos/{GH_OWNER}/{GH_REPO}/contents/{parent}"
+    params = {}
+    if GH_BRANCH:
+        params["ref"] = GH_BRANCH
+
+    resp = GH_SESSION.get(url, headers=github_headers(), params=params)
+    if resp.status_code == 200:
+        shas = {entry.get("name"): entry.get("sha") for entry in resp.json() if entry.get("type") == "file"}
+        for name, sha in shas.items():
+            _GH_SHA_CACHE[posixpath.join(parent, name)] = sha
+        return shas
+    elif resp.status_code == 404:
+        return {}
+    else:
+        st.error(f"GitHub read error for {parent}: {resp.status_code} {resp.text}")
+        return None
+
+
+def github_get_sha(path: str):
+    """Get the blob sha of a file without downloading its content.
+       Uses the parent directory listing. Returns None if not found/error.
+    """
+    path = path.replace("\\", "/")
+    parent, name = posixpath.split(path)
+    shas = github_dir_shas(parent)
+    if shas is None:
+        return None
+    if name not in shas:
+        _GH_SHA_CACHE.pop(path, None)
+    return shas.get(name)
+
+
+def github_put_file(path: str, content_bytes, message: str):
+    """Create or update a file in the GitHub repo.
+       content_bytes: any bytes-like object (bytes, memoryview), not copied.
+    """
     if not USE_GITHUB:
         return
 
     path = path.replace("\\", "/")
     url = f"https://api.github.com/repos/{GH_OWNER}/{GH_REPO}/contents/{path}"
 
-    # Check if file exists to get sha
-    existing_content, existing_sha = github_get_file(path)
-    payload = {
-        "message": message,
-        "content": b64encode(content_bytes).decode("utf-8"),
-        "branch": GH_BRANCH or "main",
-    }
-    if existing_content is not None and existing_sha:
-        payload["sha"] = existing_sha
+    # Reuse the sha from the last read/write; only GET when we have none
+    existing_sha = _GH_SHA_CACHE.get(path)
+    if existing_sha is None:
+        _, existing_sha = github_get_file(path)
 
-    resp = requests.put(url, headers=github_headers(), json=payload)
-    if resp.status_code not in (200, 201):
+    def put(sha):
+        payload = {
+            "message": message,
+            "content": b64encode(content_bytes).decode("utf-8"),
+            "branch": GH_BRANCH or "main",
+        }
+        if sha:
+            payload["sha"] = sha
+        return GH_SESSION.put(url, headers=github_headers(), json=payload)
+
+    resp = put(existing_sha)
+    if resp.status_code in (409, 422):
+        # Cached sha is stale (file changed elsewhere): refetch once and retry
+        _, existing_sha = github_get_file(path)
+        resp = put(existing_sha)
+
+    if resp.status_code in (200, 201):
+        _GH_SHA_CACHE[path] = resp.json()["content"]["sha"]
+    else:
+        _GH_SHA_CACHE.pop(path, None)
         st.error(f"GitHub write error for {path}: {resp.status_code} {resp.text}")
 
 
+def github_commit_multi(files: dict, message: str):
+    """Create or update several files in ONE commit (Git Data API).
+       files: {path: bytes}. About 5 round-trips no matter how many files.
+    """
+    if not USE_GITHUB or not files:
+        return
+
+    files = {path.replace("\\", "/"): content for path, content in files.items()}
+    api = f"https://api.github.com/repos/{GH_OWNER}/{GH_REPO}/git"
+    branch = GH_BRANCH or "main"
+
+    def post_blob(content):
+        return GH_SESSION.post(
+            f"{api}/blobs",
+            headers=github_headers(),
+            json={"content": b64encode(content).decode("utf-8"), "encoding": "base64"},
+        )
+
+    # Blobs are independent of each other: upload them in parallel
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        blob_resps = dict(zip(files, pool.map(post_blob, files.values())))
+
+    blob_shas = {}
+    for path, resp in blob_resps.items():
+        if resp.status_code != 201:
+            st.error(f"GitHub write error for {path}: {resp.status_code} {resp.text}")
+            return
+        blob_shas[path] = resp.json()["sha"]
+
+    tree_entries = [
+        {"path": path, "mode": "100644", "type": "blob", "sha": sha}
+        for path, sha in blob_shas.items()
+    ]
+
+    def commit_on_head():
+        # Build tree + commit on top of the current branch head, move the ref
+        resp = GH_SESSION.get(f"{api}/ref/heads/{branch}", headers=github_headers())
+        if resp.status_code != 200:
+            return resp
+        head_sha = resp.json()["object"]["sha"]
+
+        resp = GH_SESSION.get(f"{api}/commits/{head_sha}", headers=github_headers())
+        if resp.status_code != 200:
+            return resp
+        base_tree = resp.json()["tree"]["sha"]
+
+        resp = GH_SESSION.post(
+            f"{api}/trees",
+            headers=github_headers(),
+            json={"base_tree": base_tree, "tree": tree_entries},
+        )
+        if resp.status_code != 201:
+            return resp
+
+        resp = GH_SESSION.post(
+            f"{api}/commits",
+            headers=github_headers(),
+            json={"message": message, "tree": resp.json()["sha"], "parents": [head_sha]},
+        )
+        if resp.status_code != 201:
+            return resp
+
+        return GH_SESSION.patch(
+            f"{api}/refs/heads/{branch}",
+            headers=github_headers(),
+            json={"sha": resp.json()["sha"]},
+        )
+
+    resp = commit_on_head()
+    if resp.status_code in (409, 422):
+        # Branch moved while we were building the commit: rebase once
+        resp = commit_on_head()
+
+    if resp.status_code == 200:
+        _GH_SHA_CACHE.update(blob_shas)
+    else:
+        for path in files:
+            _GH_SHA_CACHE.pop(path, None)
+        st.error(f"GitHub write error for {', '.join(files)}: {resp.status_code} {resp.text}")
+
+
 # -------------------------
 # UTIL FUNCTIONS
 # -------------------------
@@ -139,17 +336,50 @@ def ensure_dirs():
     os.makedirs(PHOTOS_DIR, exist_ok=True)
 
 
-def load_players():
+@st.cache_resource(show_spinner=False)
+def ensure_dirs_once():
+    """ensure_dirs() once per process for the per-rerun read path (module
+       globals are rebuilt on every rerun, so a plain flag would not stick).
+       Saves still call ensure_dirs() directly.
+    """
+    ensure_dirs()
+    return True
+
+
+def data_file_version(path):
+    """Cheap change token for a data file: blob sha on GitHub, (mtime in ns,
+       size) locally. None if the file does not exist yet.
+    """
+    if USE_GITHUB:
+        return github_get_sha(path)
+    ensure_dirs_once()
+    if os.path.exists(path):
+        # Size too: coarse mtimes can repeat for a save within one tick
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+    return None
+
+
+def as_category(series, known):
+    """Categorical with the known values first; anything else in the data
+       is kept as an extra category so no value is lost.
+    """
+    extras = sorted(set(series.dropna().unique()) - set(known))
+    return series.astype(pd.CategoricalDtype(list(known) + extras))
+
+
+@st.cache_data(show_spinner=False)
+def _read_players(version):
+    """Read + normalise players.csv. Cached per file version."""
     if USE_GITHUB:
         content, _ = github_get_file(PLAYERS_FILE)
         if content is None:
             df = pd.DataFrame(columns=PLAYER_COLUMNS)
         else:
-            df = pd.read_csv(StringIO(content.decode("utf-8")), dtype=str)
+            df = pd.read_csv(BytesIO(content), dtype=str, engine="pyarrow")
     else:
-        ensure_dirs()
         if os.path.exists(PLAYERS_FILE):
-            df = pd.read_csv(PLAYERS_FILE, dtype=str)
+            df = pd.read_csv(PLAYERS_FILE, dtype=str, engine="pyarrow")
         else:
             df = pd.DataFrame(columns=PLAYER_COLUMNS)
 
@@ -159,59 +389,272 @@ def load_players():
             df[col] = ""
 
     df = df.fillna("")
+    # Low-cardinality column: compares run on int codes, not strings
+    df["gender"] = as_category(df["gender"], GENDER_OPTIONS)
+    # Derived labels, built once per file version (not saved back).
+    # full_name is "First Last" exactly as mirrored results store teammates
+    df["full_name"] = df["first_name"] + " " + df["last_name"]
+    df["display"] = player_display_names(df)
+    # Index by player_id (column kept for saving) for O(1) get_player_by_id
+    df = df.set_index("player_id", drop=False).rename_axis(None)
+    df.attrs["version"] = version
     return df
 
 
-def load_results():
+def parse_results_csv(source):
+    """results.csv (a path or the file's bytes) as a frame.
+       Only text columns are forced to str; pyarrow's multi-threaded reader
+       types the numeric columns and parses the ISO dates itself. It cannot
+       put a blank into a column it typed as integer (e.g. an empty rank),
+       so such files are re-read with the C parser, which leaves NaN.
+    """
+    text_dtypes = {col: str for col in RESULT_TEXT_COLUMNS}
+
+    def csv_input():
+        return source if isinstance(source, str) else BytesIO(source)
+
+    try:
+        return pd.read_csv(csv_input(), dtype=text_dtypes, engine="pyarrow", parse_dates=["date"])
+    except ValueError:
+        return pd.read_csv(csv_input(), dtype=text_dtypes, parse_dates=["date"])
+
+
+@st.cache_data(show_spinner=False)
+def _read_results(version):
+    """Read + parse results.csv. Cached per file version."""
     if USE_GITHUB:
         content, _ = github_get_file(RESULTS_FILE)
         if content is None:
             df = pd.DataFrame(columns=RESULT_COLUMNS)
         else:
-            df = pd.read_csv(StringIO(content.decode("utf-8")), dtype=str)
+            df = parse_results_csv(content)
     else:
-        ensure_dirs()
         if os.path.exists(RESULTS_FILE):
-            df = pd.read_csv(RESULTS_FILE, dtype=str)
+            df = parse_results_csv(RESULTS_FILE)
         else:
             df = pd.DataFrame(columns=RESULT_COLUMNS)
 
     if not df.empty:
-        for col in ["points", "prize_money"]:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-        if "rank" in df.columns:
-            df["rank"] = pd.to_numeric(df["rank"], errors="coerce")
-        df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
+        # Coerce only if a column holds junk the parser couldn't read as numbers
+        for col in ["points", "prize_money", "rank"]:
+            if col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+                df[col] = pd.to_numeric(df[col], errors="coerce")
+        df["event_type"] = as_category(df["event_type"], EVENT_TYPES)
+    # datetime64 (not date objects): window filters compare int64s.
+    # ISO dates are already parsed by the reader; only junk is left over.
+    # Empty frames get the dtype too, so rows added to them save as ISO dates
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df.attrs["version"] = version
     return df
 
 
-def save_players(df):
-    csv_bytes = df.to_csv(index=False).encode("utf-8")
+def load_players():
+    # st.cache_data hands out a fresh copy per call, so callers may mutate it
+    return _read_players(data_file_version(PLAYERS_FILE))
+
+
+def load_results():
+    return _read_results(data_file_version(RESULTS_FILE))
+
+
+@st.cache_data(show_spinner=False, ttl=600, max_entries=64)
+def github_photo(path):
+    """Photo bytes from GitHub (None if missing). Cached; cleared whenever
+       this app saves a photo, refetched after 10 min for outside edits.
+    """
+    content, _ = github_get_file(path)
+    return content
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def local_photo(path, mtime):
+    """Photo bytes from disk, read once per (path, mtime)."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def load_data():
+    """(players_df, results_df). On GitHub one listing of the data directory
+       gives both versions, then both files are fetched concurrently.
+    """
+    if not USE_GITHUB:
+        return load_players(), load_results()
+
+    shas = github_dir_shas(DATA_DIR) or {}
+    players_version = shas.get(os.path.basename(PLAYERS_FILE))
+    results_version = shas.get(os.path.basename(RESULTS_FILE))
+
+    # Worker threads need the script context for st.cache_data / st.error
+    ctx = get_script_run_ctx()
+
+    def run(loader):
+        add_script_run_ctx(ctx=ctx)
+        return loader()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        players_future = pool.submit(run, lambda: _read_players(players_version))
+        results_future = pool.submit(run, lambda: _read_results(results_version))
+        return players_future.result(), results_future.result()
+
+
+def csv_bytes(df):
+    """A data frame as UTF-8 CSV bytes (no index)."""
+    # pandas streams encoded chunks into the buffer; no full CSV str
+    buf = BytesIO()
+    df.to_csv(buf, index=False, encoding="utf-8")
+    return buf.getbuffer()
+
+
+def write_csv_atomic(df, path):
+    """Write a CSV next to its target and rename it into place, so a crash
+       mid-write never leaves a truncated file behind.
+    """
+    tmp_path = path + ".tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def save_data(players_df=None, results_df=None, photos=None, message=None):
+    """Save players.csv and/or results.csv plus any photos ({path: bytes-like}).
+       On GitHub several files go out as one commit.
+    """
+    photos = photos or {}
     if USE_GITHUB:
-        github_put_file(PLAYERS_FILE, csv_bytes, "Update players.csv from Streamlit app")
+        files = dict(photos)
+        if players_df is not None:
+            files[PLAYERS_FILE] = csv_bytes(players_df.drop(columns=DERIVED_PLAYER_COLUMNS, errors="ignore"))
+        if results_df is not None:
+            files[RESULTS_FILE] = csv_bytes(results_df)
+        # Skip files whose content matches the last known blob (no-op saves)
+        files = {
+            path: content for path, content in files.items()
+            if _GH_SHA_CACHE.get(path.replace("\\", "/")) != git_blob_sha(content)
+        }
+        if message is None:
+            names = ", ".join(os.path.basename(path) for path in files)
+            message = f"Update {names} from Streamlit app"
+
+        if len(files) == 1:
+            (path, content), = files.items()
+            github_put_file(path, content, message)
+        elif files:
+            github_commit_multi(files, message)
     else:
         ensure_dirs()
-        df.to_csv(PLAYERS_FILE, index=False)
+        for path, content in photos.items():
+            with open(path, "wb") as f:
+                f.write(content)
+        if players_df is not None:
+            write_csv_atomic(players_df.drop(columns=DERIVED_PLAYER_COLUMNS, errors="ignore"), PLAYERS_FILE)
+        if results_df is not None:
+            write_csv_atomic(results_df, RESULTS_FILE)
+
+    if players_df is not None:
+        _read_players.clear()
+    if results_df is not None:
+        clear_results_caches()
+    if photos:
+        github_photo.clear()
+
+
+def clear_results_caches():
+    """Drop everything derived from results.csv after a save."""
+    _read_results.clear()
+    _result_rows_by_player.clear()
+    _cached_player_points.clear()
+    _cached_player_totals.clear()
+    _cached_rank_card_details.clear()
+
+
+def save_players(df):
+    save_data(players_df=df)
 
 
 def save_results(df):
-    csv_bytes = df.to_csv(index=False).encode("utf-8")
-    if USE_GITHUB:
-        github_put_file(RESULTS_FILE, csv_bytes, "Update results.csv from Streamlit app")
-    else:
-        ensure_dirs()
-        df.to_csv(RESULTS_FILE, index=False)
+    save_data(results_df=df)
+
+
+def append_results(results_df, new_rows):
+    """Add new_rows to the loaded results_df and save. Locally the rows are
+       appended to results.csv, so the loaded table is never copied; GitHub
+       has no append, so the full file goes out there. A file whose header
+       lacks one of the new columns is rewritten in full as well.
+    """
+    header = None
+    if not USE_GITHUB and os.path.exists(RESULTS_FILE) and os.path.getsize(RESULTS_FILE) > 0:
+        header = pd.read_csv(RESULTS_FILE, nrows=0).columns
+    if header is None or not new_rows.columns.isin(header).all():
+        save_results(pd.concat([results_df, new_rows], ignore_index=True))
+        return
+    with open(RESULTS_FILE, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        needs_newline = f.read(1) not in (b"\n", b"\r")
+    with open(RESULTS_FILE, "a", encoding="utf-8", newline="") as f:
+        if needs_newline:
+            f.write("\n")
+        new_rows.reindex(columns=header).to_csv(f, index=False, header=False)
+    clear_results_caches()
+
+
+def clean_text(series):
+    """Series as stripped strings, blanks for missing cells."""
+    return series.fillna("").astype(str).str.strip()
 
 
 def new_id():
     return str(uuid.uuid4())
 
 
-def player_display_name(row):
-    base = f"{row['first_name']} {row['last_name']}".strip()
-    if isinstance(row.get("fivb_id"), str) and row["fivb_id"].strip():
-        return f"{base} (FIVB: {row['fivb_id']})"
-    return base
+def player_display_names(df):
+    """Dropdown labels 'First Last (FIVB: id)' ('First Last' without FIVB ID)."""
+    base = df["full_name"].str.strip()
+    has_fivb = df["fivb_id"].str.strip() != ""
+    return base.where(~has_fivb, base + " (FIVB: " + df["fivb_id"] + ")")
+
+
+def teammate_labels(df):
+    """Teammate dropdown labels 'First Last (FIVB: id)', built column-wise."""
+    return (df["full_name"] + " (FIVB: " + df["fivb_id"] + ")").tolist()
+
+
+def player_picker_cache(players_df):
+    """Sorted picker labels -> player_id, sorted display labels (+ label ->
+       player_id), and teammate labels by player_id. Kept in session_state
+       and rebuilt only when players.csv changes.
+    """
+    version = players_df.attrs.get("version")
+    cached = st.session_state.get("_player_picker")
+    if version is None or cached is None or cached["version"] != version:
+        sorted_df = players_df.sort_values(["last_name", "first_name"])
+        cached = {
+            "version": version,
+            "mapping": dict(zip(sorted_df["display"], sorted_df["player_id"])),
+            "teammates": pd.Series(teammate_labels(players_df), index=players_df["player_id"].to_numpy()),
+            "display_options": players_df["display"].sort_values().tolist(),
+            "display_to_id": ids_by_display(players_df),
+        }
+        st.session_state["_player_picker"] = cached
+    return cached
+
+
+def show_results_table(df, empty_text):
+    """Results table without the technical ID columns (info note if empty),
+       capped at the first MAX_DISPLAY_ROWS rows of df as ordered.
+    """
+    if df.empty:
+        st.info(empty_text)
+        return
+    # CoW: drop() does not copy the column data
+    table = df.head(MAX_DISPLAY_ROWS).drop(columns=["result_id", "player_id", "_bucket"], errors="ignore")
+    st.dataframe(table.reset_index(drop=True), use_container_width=True, column_config=RESULT_COLUMN_CONFIG)
+    if len(df) > MAX_DISPLAY_ROWS:
+        st.caption(f"Showing the first {MAX_DISPLAY_ROWS} of {len(df)} results.")
+
+
+def date_text(value):
+    """A results date as YYYY-MM-DD ("" when missing)."""
+    return value.strftime("%Y-%m-%d") if pd.notna(value) else ""
 
 
 def shirt_or_name(row):
@@ -222,12 +665,81 @@ def shirt_or_name(row):
 
 
 def get_player_by_id(players_df, player_id):
-    if players_df.empty:
+    """Look up a player on the player_id index set by load_players()."""
+    if player_id not in players_df.index:
         return None
-    row = players_df[players_df["player_id"] == player_id]
-    if row.empty:
-        return None
-    return row.iloc[0]
+    row = players_df.loc[player_id]
+    if isinstance(row, pd.DataFrame):
+        row = row.iloc[0]
+    return row
+
+
+def player_ids_by_name(players_df):
+    """Map 'First Last' -> player_id; the first player wins on duplicate names."""
+    return dict(zip(players_df["full_name"][::-1], players_df["player_id"][::-1]))
+
+
+def ids_by_display(players_df):
+    """Map display label -> player_id; the first row wins on duplicate labels."""
+    return dict(zip(players_df["display"][::-1], players_df["player_id"][::-1]))
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _result_rows_by_player(version, _results_df):
+    """(player_ids, order, bounds), built once per file version: row
+       positions sorted by player, then date (undated last). The rows of
+       player_ids[i] are order[bounds[i]:bounds[i + 1]].
+    """
+    order = np.argsort(_results_df["date"].to_numpy(), kind="stable")
+    codes, player_ids = pd.factorize(_results_df["player_id"].to_numpy()[order], sort=True)
+    by_player = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[by_player], np.arange(len(player_ids) + 1))
+    return player_ids, order[by_player], bounds
+
+
+def player_results(results_df, player_id):
+    """All results of one player, oldest first. Frames from load_results()
+       use a per-version index instead of scanning the whole table.
+    """
+    version = results_df.attrs.get("version")
+    if version is None:
+        own = results_df[results_df["player_id"] == player_id]
+        return own.sort_values("date", kind="mergesort")
+    player_ids, order, bounds = _result_rows_by_player(version, results_df)
+    i = np.searchsorted(player_ids, player_id)
+    if i == len(player_ids) or player_ids[i] != player_id:
+        return results_df.iloc[:0]
+    return results_df.iloc[order[bounds[i]:bounds[i + 1]]]
+
+
+def newest_first(rows):
+    """player_results() rows (oldest first, undated last) newest first.
+       Undated rows stay last and same-day rows keep their file order.
+    """
+    dates = rows["date"].to_numpy()
+    dated = int(pd.notna(dates).sum())
+    # Dated rows lead in oldest-first order: sort them by date descending,
+    # ties by position
+    newest = np.lexsort((np.arange(dated), -dates[:dated].astype("int64")))
+    return rows.iloc[np.concatenate([newest, np.arange(dated, len(rows))])]
+
+
+def find_mirrored_results(results_df, result_id, teammate_id, player_name):
+    """Index labels of the teammate's copy of result `result_id`.
+       A mirror belongs to teammate_id, names player_name as teammate and
+       matches on every MIRROR_KEY_COLUMNS value. Rows are compared by row
+       hash, so no column has to be re-parsed.
+    """
+    candidates = results_df[
+        (results_df["player_id"] == teammate_id) & (results_df["teammate"] == player_name)
+    ]
+    own = results_df.loc[results_df["result_id"] == result_id, MIRROR_KEY_COLUMNS]
+    if candidates.empty or own.empty:
+        return candidates.index[:0]
+
+    keys = pd.util.hash_pandas_object(candidates[MIRROR_KEY_COLUMNS], index=False)
+    own_key = pd.util.hash_pandas_object(own.iloc[:1], index=False).iloc[0]
+    return candidates.index[keys.to_numpy() == own_key]
 
 
 def calculate_player_points(results_df, player_id, mode="365", ref_date=None,
@@ -236,8 +748,25 @@ def calculate_player_points(results_df, player_id, mode="365", ref_date=None,
     mode = "365" -> last 365 days from ref_date
     mode = "custom" -> between start_date and end_date
     Returns dict with totals + selected rows.
+    Memoised per results file version (set by load_results()).
     """
-    res = results_df[results_df["player_id"] == player_id].copy()
+    if mode == "365" and ref_date is None:
+        ref_date = date.today()
+    version = results_df.attrs.get("version")
+    if version is None:
+        return _player_points(results_df, player_id, mode, ref_date, start_date, end_date)
+    return _cached_player_points(version, player_id, mode, ref_date, start_date, end_date, results_df)
+
+
+@st.cache_data(show_spinner=False, max_entries=5000)
+def _cached_player_points(version, player_id, mode, ref_date, start_date, end_date, _results_df):
+    # _results_df is not hashed: the file version identifies its content
+    return _player_points(_results_df, player_id, mode, ref_date, start_date, end_date)
+
+
+def _player_points(results_df, player_id, mode, ref_date, start_date, end_date):
+    # A new frame either way; no extra .copy() needed
+    res = player_results(results_df, player_id)
     if res.empty:
         return {
             "total_points": 0.0,
@@ -249,11 +778,10 @@ def calculate_player_points(results_df, player_id, mode="365", ref_date=None,
             "period_text": "",
         }
 
-    res["date"] = pd.to_datetime(res["date"], errors="coerce").dt.date
+    # res is in date order: the window is one contiguous slice
+    dates = res["date"].to_numpy()
 
     if mode == "365":
-        if ref_date is None:
-            ref_date = date.today()
         start = ref_date - timedelta(days=365)
         end = ref_date
         period_text = f"{start.isoformat()} → {end.isoformat()} (last 365 days)"
@@ -272,7 +800,11 @@ def calculate_player_points(results_df, player_id, mode="365", ref_date=None,
             }
         period_text = f"{start.isoformat()} → {end.isoformat()}"
 
-    window = res[(res["date"] >= start) & (res["date"] <= end)].copy()
+    lo = np.searchsorted(dates, np.datetime64(start), side="left")
+    hi = np.searchsorted(dates, np.datetime64(end), side="right")
+    # No caller shows the ID columns; dropping them here also keeps them out
+    # of every cached (pickled) result
+    window = res.iloc[lo:hi].drop(columns=["result_id", "player_id"])
     if window.empty:
         return {
             "total_points": 0.0,
@@ -284,56 +816,111 @@ def calculate_player_points(results_df, player_id, mode="365", ref_date=None,
             "period_text": period_text,
         }
 
-    window["points"] = pd.to_numeric(window["points"], errors="coerce").fillna(0.0)
+    window = window.assign(points=pd.to_numeric(window["points"], errors="coerce").fillna(0.0))
 
-    # Scenario A: allow AVC Multi/Zonal, disallow Other Multi/Zonal
-    bucket1_A = window[window["event_type"].isin(["AVC", "AVC Multi/Zonal"])].copy()
-    bucket2_A = window[window["event_type"] == "FIVB"].copy()
+    points = window["points"].to_numpy()
+    # One mask per event type, combined per scenario below
+    event_types = window["event_type"].to_numpy()
+    is_avc = event_types == "AVC"
+    is_avc_mz = event_types == "AVC Multi/Zonal"
+    is_fivb = event_types == "FIVB"
+    is_other_mz = event_types == "Other Multi/Zonal"
 
-    bucket1_A_top = bucket1_A.sort_values("points", ascending=False).head(4)
-    bucket2_A_top = bucket2_A.sort_values("points", ascending=False).head(4)
+    def best4(mask):
+        """Positions and points sum of the best 4 rows in the mask."""
+        pos = np.flatnonzero(mask)
+        if pos.size > 4:
+            # O(N) selection; only the 4 winners get sorted, for display
+            pos = pos[np.argpartition(points[pos], -4)[-4:]]
+        return pos, points[pos].sum()
 
-    bucket1_A_pts = bucket1_A_top["points"].sum()
-    bucket2_A_pts = bucket2_A_top["points"].sum()
+    # Scenario A: allow AVC Multi/Zonal, disallow Other Multi/Zonal
+    bucket1_A_top, bucket1_A_pts = best4(is_avc | is_avc_mz)
+    bucket2_A_top, bucket2_A_pts = best4(is_fivb)
     total_A = bucket1_A_pts + bucket2_A_pts
 
-    # Scenario B: allow Other Multi/Zonal, disallow AVC Multi/Zonal
-    bucket1_B = window[window["event_type"] == "AVC"].copy()
-    bucket2_B = window[window["event_type"].isin(["FIVB", "Other Multi/Zonal"])].copy()
-
-    bucket1_B_top = bucket1_B.sort_values("points", ascending=False).head(4)
-    bucket2_B_top = bucket2_B.sort_values("points", ascending=False).head(4)
-
-    bucket1_B_pts = bucket1_B_top["points"].sum()
-    bucket2_B_pts = bucket2_B_top["points"].sum()
-    total_B = bucket1_B_pts + bucket2_B_pts
-
-    if total_A >= total_B:
-        selected = pd.concat([bucket1_A_top, bucket2_A_top], ignore_index=True)
+    # Scenario B: allow Other Multi/Zonal, disallow AVC Multi/Zonal.
+    # Its AVC side can never beat A's, so B only has a chance when some
+    # Other Multi/Zonal result would make it into the FIVB top 4.
+    other_mz = points[is_other_mz]
+    use_B = False
+    if other_mz.size and (bucket2_A_top.size < 4 or other_mz.max() > points[bucket2_A_top].min()):
+        bucket1_B_top, bucket1_B_pts = best4(is_avc)
+        bucket2_B_top, bucket2_B_pts = best4(is_fivb | is_other_mz)
+        total_B = bucket1_B_pts + bucket2_B_pts
+        use_B = total_B > total_A
+
+    # Only the winning scenario's rows are materialised
+    if not use_B:
+        bucket1_top, bucket2_top = bucket1_A_top, bucket2_A_top
         scenario = "AVC_MZ_used"
         total_points = total_A
         bucket1_points = bucket1_A_pts
         bucket2_points = bucket2_A_pts
     else:
-        selected = pd.concat([bucket1_B_top, bucket2_B_top], ignore_index=True)
+        bucket1_top, bucket2_top = bucket1_B_top, bucket2_B_top
         scenario = "Other_MZ_used"
         total_points = total_B
         bucket1_points = bucket1_B_pts
         bucket2_points = bucket2_B_pts
 
-    selected = selected.sort_values("points", ascending=False)
+    # _bucket: 0 = AVC side, 1 = FIVB side, so readers need no event_type masks
+    selected = window.iloc[np.concatenate([bucket1_top, bucket2_top])].assign(
+        _bucket=np.repeat(np.int8([0, 1]), [bucket1_top.size, bucket2_top.size])
+    )
+    selected = selected.sort_values("points", ascending=False).reset_index(drop=True)
 
     return {
         "total_points": float(total_points),
         "bucket1_points": float(bucket1_points),
         "bucket2_points": float(bucket2_points),
         "selected_results": selected,
-        "window_results": window.sort_values("date"),
+        "window_results": window,
         "scenario": scenario,
         "period_text": period_text,
     }
 
 
+def player_totals(results_df, ref_date):
+    """total_points of calculate_player_points(mode="365") for every player
+       at once. Returns a Series indexed by player_id (players without
+       results in the window are absent). Memoised per results file version.
+    """
+    version = results_df.attrs.get("version")
+    if version is None:
+        return _player_totals(results_df, ref_date)
+    return _cached_player_totals(version, ref_date, results_df)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_player_totals(version, ref_date, _results_df):
+    return _player_totals(_results_df, ref_date)
+
+
+def _player_totals(results_df, ref_date):
+    dates = results_df["date"].to_numpy()
+    start = np.datetime64(ref_date - timedelta(days=365))
+    end = np.datetime64(ref_date)
+    window = results_df[(dates >= start) & (dates <= end)]
+    window = window.assign(points=pd.to_numeric(window["points"], errors="coerce").fillna(0.0))
+
+    # Best 4 per (player, event type); a bucket's best 4 are among these
+    top = (
+        window.sort_values("points", ascending=False, kind="mergesort")
+        .groupby(["player_id", "event_type"], sort=False, observed=True)
+        .head(4)
+    )
+
+    def best4(event_types):
+        rows = top[top["event_type"].isin(event_types)]
+        return rows.groupby("player_id", sort=False).head(4).groupby("player_id")["points"].sum()
+
+    # Scenario A (AVC Multi/Zonal allowed) vs B (Other Multi/Zonal allowed)
+    total_a = best4(["AVC", "AVC Multi/Zonal"]).add(best4(["FIVB"]), fill_value=0.0)
+    total_b = best4(["AVC"]).add(best4(["FIVB", "Other Multi/Zonal"]), fill_value=0.0)
+    return pd.concat([total_a, total_b], axis=1).fillna(0.0).max(axis=1)
+
+
 # -------------------------
 # PAGE: ADD / EDIT PLAYER
 # -------------------------
@@ -341,20 +928,13 @@ def calculate_player_points(results_df, player_id, mode="365", ref_date=None,
 def page_add_edit_player():
     st.title("🏐 Player Manager – Add / Edit Players")
 
-    players_df = load_players()
-    results_df = load_results()
+    players_df, results_df = load_data()
 
     st.markdown("Use this page to **create new players** or **edit existing players**.")
 
-    if players_df.empty:
-        options = ["<New Player>"]
-        mapping = {}
-    else:
-        mapping = {
-            player_display_name(row): row["player_id"]
-            for _, row in players_df.sort_values(["last_name", "first_name"]).iterrows()
-        }
-        options = ["<New Player>"] + list(mapping.keys())
+    picker = player_picker_cache(players_df)
+    mapping = picker["mapping"]
+    options = ["<New Player>"] + list(mapping.keys())
 
     selected_label = st.selectbox("Select player to edit", options)
     selected_player_id = mapping.get(selected_label)
@@ -418,21 +998,12 @@ def page_add_edit_player():
         if player_row is None:
             player_id = new_id()
             photo_path = ""
+            photos = {}
             if photo_file is not None:
                 ext = os.path.splitext(photo_file.name)[1]
                 photo_filename = f"{player_id}{ext}"
                 photo_path = f"photos/{photo_filename}"
-
-                if USE_GITHUB:
-                    github_put_file(
-                        os.path.join(DATA_DIR, photo_path),
-                        bytes(photo_file.getbuffer()),
-                        f"Upload photo for player {player_id}",
-                    )
-                else:
-                    ensure_dirs()
-                    with open(os.path.join(DATA_DIR, photo_path), "wb") as f:
-                        f.write(photo_file.getbuffer())
+                photos[os.path.join(DATA_DIR, photo_path)] = photo_file.getbuffer()
 
             new_player = pd.DataFrame(
                 [{
@@ -449,28 +1020,24 @@ def page_add_edit_player():
             )
 
             players_df = pd.concat([players_df, new_player], ignore_index=True)
-            save_players(players_df)
+            # Photo and players.csv land in the same commit on GitHub
+            save_data(
+                players_df=players_df,
+                photos=photos,
+                message=f"Upload photo for player {player_id}" if photos else None,
+            )
             st.success("New player created successfully ✅")
         else:
             # Update existing player
-            idx = players_df[players_df["player_id"] == player_row["player_id"]].index[0]
+            idx = player_row["player_id"]  # players_df is indexed by player_id
 
             photo_path = players_df.loc[idx, "photo_file"] or ""
+            photos = {}
             if photo_file is not None:
                 ext = os.path.splitext(photo_file.name)[1]
                 photo_filename = f"{player_row['player_id']}{ext}"
                 photo_path = f"photos/{photo_filename}"
-
-                if USE_GITHUB:
-                    github_put_file(
-                        os.path.join(DATA_DIR, photo_path),
-                        bytes(photo_file.getbuffer()),
-                        f"Upload/update photo for player {player_row['player_id']}",
-                    )
-                else:
-                    ensure_dirs()
-                    with open(os.path.join(DATA_DIR, photo_path), "wb") as f:
-                        f.write(photo_file.getbuffer())
+                photos[os.path.join(DATA_DIR, photo_path)] = photo_file.getbuffer()
 
             players_df.loc[idx, "first_name"] = first_name.strip()
             players_df.loc[idx, "last_name"] = last_name.strip()
@@ -481,7 +1048,11 @@ def page_add_edit_player():
             players_df.loc[idx, "nationality"] = nationality.strip()
             players_df.loc[idx, "photo_file"] = photo_path
 
-            save_players(players_df)
+            save_data(
+                players_df=players_df,
+                photos=photos,
+                message=f"Upload/update photo for player {player_row['player_id']}" if photos else None,
+            )
             st.success("Player information updated ✅")
 
     # Add / edit results for selected player
@@ -502,13 +1073,8 @@ def page_add_edit_player():
                 tournament_name = st.text_input("Tournament name")
             with c3:
                 # Teammate selection from existing players
-                all_players = players_df.copy()
-                other_players = all_players[all_players["player_id"] != player_row["player_id"]]
-
-                teammate_options = ["(None)"] + [
-                    f"{r['first_name']} {r['last_name']} (FIVB: {r['fivb_id']})"
-                    for _, r in other_players.iterrows()
-                ]
+                teammates = picker["teammates"]
+                teammate_options = ["(None)"] + teammates[teammates.index != player_row["player_id"]].tolist()
 
                 teammate_label = st.selectbox("Teammate (from database)", teammate_options)
 
@@ -529,7 +1095,7 @@ def page_add_edit_player():
                 "result_id": new_id(),
                 "player_id": player_row["player_id"],
                 "season": str(season),
-                "date": date_value,
+                "date": pd.Timestamp(date_value),
                 "event_type": event_type,
                 "tournament_name": tournament_name,
                 "teammate": teammate,
@@ -538,21 +1104,19 @@ def page_add_edit_player():
                 "prize_money": float(prize_money),
             }
 
-            results_df = pd.concat([results_df, pd.DataFrame([new_result_A])], ignore_index=True)
+            # Stage new rows and concat once (each concat copies the whole frame)
+            new_results = [new_result_A]
 
             # 2) If teammate selected, also add mirrored result for teammate (B)
             if teammate != "":
-                full_name_A = f"{player_row['first_name']} {player_row['last_name']}"
-                teammate_row_df = players_df[
-                    (players_df["first_name"] + " " + players_df["last_name"]) == teammate
-                ]
-                if not teammate_row_df.empty:
-                    teammate_id = teammate_row_df.iloc[0]["player_id"]
+                full_name_A = player_row["full_name"]
+                teammate_id = player_ids_by_name(players_df).get(teammate)
+                if teammate_id is not None:
                     new_result_B = {
                         "result_id": new_id(),
                         "player_id": teammate_id,
                         "season": str(season),
-                        "date": date_value,
+                        "date": pd.Timestamp(date_value),
                         "event_type": event_type,
                         "tournament_name": tournament_name,
                         "teammate": full_name_A,
@@ -560,29 +1124,28 @@ def page_add_edit_player():
                         "rank": int(rank),
                         "prize_money": float(prize_money),
                     }
-                    results_df = pd.concat([results_df, pd.DataFrame([new_result_B])], ignore_index=True)
+                    new_results.append(new_result_B)
 
-            save_results(results_df)
+            append_results(results_df, pd.DataFrame(new_results))
             st.success("Result added (including teammate, if selected) ✅")
             st.rerun()
 
         st.markdown("### Existing Results for This Player")
 
-        player_results = results_df[results_df["player_id"] == player_row["player_id"]]
+        own_results = player_results(results_df, player_row["player_id"])
 
-        if player_results.empty:
+        if own_results.empty:
             st.info("No results stored yet.")
         else:
-            # Display without technical IDs
-            display_cols = [c for c in player_results.columns if c not in ["result_id", "player_id"]]
-            player_results_sorted = player_results.sort_values("date", ascending=False).reset_index(drop=True)
-            st.dataframe(player_results_sorted[display_cols], use_container_width=True)
+            player_results_sorted = newest_first(own_results).reset_index(drop=True)
+            show_results_table(player_results_sorted, "No results stored yet.")
 
             st.markdown("#### ✏️ Edit a Result")
-            result_choices = [
-                f"{r['date']} — {r['tournament_name']} ({r['event_type']})"
-                for _, r in player_results_sorted.iterrows()
-            ]
+            result_choices = (
+                player_results_sorted["date"].dt.strftime("%Y-%m-%d").fillna("")
+                + " — " + player_results_sorted["tournament_name"].astype(str).fillna("")
+                + " (" + player_results_sorted["event_type"].astype(str).fillna("") + ")"
+            ).tolist()
 
             selected_edit = st.selectbox("Select result to edit", ["(None)"] + result_choices)
 
@@ -591,15 +1154,8 @@ def page_add_edit_player():
                 edit_row = player_results_sorted.iloc[idx]
                 res_id = edit_row["result_id"]
 
-                # Keep original values for mirrored update
-                orig_season = edit_row["season"]
-                orig_date = edit_row["date"]
-                orig_event_type = edit_row["event_type"]
-                orig_tournament = edit_row["tournament_name"]
+                # Keep original teammate for mirrored update
                 orig_teammate = edit_row["teammate"]
-                orig_points = float(edit_row["points"])
-                orig_rank = float(edit_row["rank"])
-                orig_prize = float(edit_row["prize_money"])
 
                 st.markdown("### Edit Result Details")
                 with st.form("edit_result_form"):
@@ -616,13 +1172,8 @@ def page_add_edit_player():
                         tournament_edit = st.text_input("Tournament name", edit_row["tournament_name"])
                     with colC:
                         # Teammate dropdown for edit
-                        all_players = players_df.copy()
-                        other_players = all_players[all_players["player_id"] != player_row["player_id"]]
-
-                        teammate_options2 = ["(None)"] + [
-                            f"{r['first_name']} {r['last_name']} (FIVB: {r['fivb_id']})"
-                            for _, r in other_players.iterrows()
-                        ]
+                        teammates = picker["teammates"]
+                        teammate_options2 = ["(None)"] + teammates[teammates.index != player_row["player_id"]].tolist()
 
                         # Default selection
                         if not edit_row["teammate"]:
@@ -649,10 +1200,19 @@ def page_add_edit_player():
                     submitted_edit = st.form_submit_button("💾 Save Changes")
 
                 if submitted_edit:
+                    # Find teammate's mirrored result (if teammate not changed)
+                    # before this row is overwritten
+                    mirrored_idx = None
+                    if orig_teammate and orig_teammate == teammate_edit:
+                        tm_id = player_ids_by_name(players_df).get(orig_teammate)
+                        if tm_id is not None:
+                            full_name_A = player_row["full_name"]
+                            mirrored_idx = find_mirrored_results(results_df, res_id, tm_id, full_name_A)
+
                     # Update this player's result
                     mask = results_df["result_id"] == res_id
                     results_df.loc[mask, "season"] = season_edit
-                    results_df.loc[mask, "date"] = date_edit
+                    results_df.loc[mask, "date"] = pd.Timestamp(date_edit)
                     results_df.loc[mask, "event_type"] = event_type_edit
                     results_df.loc[mask, "tournament_name"] = tournament_edit
                     results_df.loc[mask, "teammate"] = teammate_edit
@@ -660,36 +1220,15 @@ def page_add_edit_player():
                     results_df.loc[mask, "rank"] = rank_edit
                     results_df.loc[mask, "prize_money"] = prize_edit
 
-                    # Try to update teammate's mirrored result if teammate not changed
-                    if orig_teammate and orig_teammate == teammate_edit:
-                        tm_row = players_df[
-                            (players_df["first_name"] + " " + players_df["last_name"]) == orig_teammate
-                        ]
-                        if not tm_row.empty:
-                            tm_id = tm_row.iloc[0]["player_id"]
-                            full_name_A = f"{player_row['first_name']} {player_row['last_name']}"
-
-                            mirrored_mask = (
-                                (results_df["player_id"] == tm_id) &
-                                (results_df["teammate"] == full_name_A) &
-                                (results_df["season"] == orig_season) &
-                                (pd.to_datetime(results_df["date"], errors="coerce").dt.date == orig_date) &
-                                (results_df["event_type"] == orig_event_type) &
-                                (results_df["tournament_name"] == orig_tournament) &
-                                (pd.to_numeric(results_df["points"], errors="coerce") == orig_points) &
-                                (pd.to_numeric(results_df["rank"], errors="coerce") == orig_rank) &
-                                (pd.to_numeric(results_df["prize_money"], errors="coerce") == orig_prize)
-                            )
-
-                            if mirrored_mask.any():
-                                results_df.loc[mirrored_mask, "season"] = season_edit
-                                results_df.loc[mirrored_mask, "date"] = date_edit
-                                results_df.loc[mirrored_mask, "event_type"] = event_type_edit
-                                results_df.loc[mirrored_mask, "tournament_name"] = tournament_edit
-                                # teammate for mirrored side stays as this player
-                                results_df.loc[mirrored_mask, "points"] = points_edit
-                                results_df.loc[mirrored_mask, "rank"] = rank_edit
-                                results_df.loc[mirrored_mask, "prize_money"] = prize_edit
+                    if mirrored_idx is not None and len(mirrored_idx):
+                        results_df.loc[mirrored_idx, "season"] = season_edit
+                        results_df.loc[mirrored_idx, "date"] = pd.Timestamp(date_edit)
+                        results_df.loc[mirrored_idx, "event_type"] = event_type_edit
+                        results_df.loc[mirrored_idx, "tournament_name"] = tournament_edit
+                        # teammate for mirrored side stays as this player
+                        results_df.loc[mirrored_idx, "points"] = points_edit
+                        results_df.loc[mirrored_idx, "rank"] = rank_edit
+                        results_df.loc[mirrored_idx, "prize_money"] = prize_edit
 
                     save_results(results_df)
                     st.success("Result updated ✅")
@@ -733,15 +1272,6 @@ Players will be created or matched using **FIVB ID**.
     if uploaded_file is None:
         return
 
-    try:
-        df = pd.read_excel(uploaded_file)
-    except Exception as e:
-        st.error(f"Error reading file: {e}")
-        return
-
-    st.write("Preview of uploaded data:")
-    st.dataframe(df.head(), use_container_width=True)
-
     required_cols = [
         "first_name",
         "last_name",
@@ -760,83 +1290,89 @@ Players will be created or matched using **FIVB ID**.
         "prize_money",
     ]
 
+    # Parse only the columns we use; IDs/free text stay text (no 172222.0)
+    text_cols = [c for c in required_cols if c not in ("date", "points", "rank", "prize_money")]
+    try:
+        df = pd.read_excel(
+            uploaded_file,
+            engine=EXCEL_ENGINE,
+            usecols=lambda c: c in required_cols,
+            dtype={c: str for c in text_cols},
+        )
+    except Exception as e:
+        st.error(f"Error reading file: {e}")
+        return
+
+    st.write("Preview of uploaded data:")
+    st.dataframe(df.head(), use_container_width=True)
+
     missing = [c for c in required_cols if c not in df.columns]
     if missing:
         st.error(f"Missing columns: {missing}")
         return
 
-    players_df = load_players()
-    results_df = load_results()
+    players_df, results_df = load_data()
 
     if st.button("✅ Import into database"):
-        df["birth_date"] = df["birth_date"].astype(str)
-        df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.date
+        # Dates only: drop any time of day the spreadsheet cell carries
+        df["date"] = pd.to_datetime(df["date"], errors="coerce").dt.normalize()
         df["points"] = pd.to_numeric(df["points"], errors="coerce").fillna(0.0)
         df["prize_money"] = pd.to_numeric(df["prize_money"], errors="coerce").fillna(0.0)
         df["rank"] = pd.to_numeric(df["rank"], errors="coerce").fillna(0).astype(int)
 
-        fivb_to_player_id = {}
-
-        for _, row in df.iterrows():
-            fivb = str(row["fivb_id"]).strip()
-            if not fivb:
-                continue
-
-            if fivb in fivb_to_player_id:
-                continue
-
-            existing = players_df[players_df["fivb_id"] == fivb]
-            if existing.empty:
-                pid = new_id()
-                new_player = pd.DataFrame(
-                    [{
-                        "player_id": pid,
-                        "first_name": str(row["first_name"]).strip(),
-                        "last_name": str(row["last_name"]).strip(),
-                        "shirt_name": str(row["shirt_name"]).strip(),
-                        "gender": str(row["gender"]).strip(),
-                        "fivb_id": fivb,
-                        "birth_date": str(row["birth_date"]).strip(),
-                        "nationality": str(row["nationality"]).strip(),
-                        "photo_file": "",
-                    }]
-                )
-                players_df = pd.concat([players_df, new_player], ignore_index=True)
-            else:
-                pid = existing.iloc[0]["player_id"]
-
-            fivb_to_player_id[fivb] = pid
-
-        save_players(players_df)
-
-        new_results_list = []
-        for _, row in df.iterrows():
-            fivb = str(row["fivb_id"]).strip()
-            if fivb not in fivb_to_player_id:
-                continue
-            pid = fivb_to_player_id[fivb]
-
-            new_results_list.append(
-                {
-                    "result_id": new_id(),
-                    "player_id": pid,
-                    "season": str(row["season"]),
-                    "date": row["date"],
-                    "event_type": str(row["event_type"]).strip(),
-                    "tournament_name": str(row["tournament_name"]).strip(),
-                    "teammate": str(row["teammate"]).strip(),
-                    "points": float(row["points"]),
-                    "rank": int(row["rank"]),
-                    "prize_money": float(row["prize_money"]),
-                }
-            )
-
-        if new_results_list:
-            new_results_df = pd.DataFrame(new_results_list)
+        # Match players on FIVB ID in one pass: existing players keep their
+        # id, every unseen FIVB ID becomes one new player (first row wins)
+        df["fivb_id"] = clean_text(df["fivb_id"])
+        incoming = df[df["fivb_id"] != ""].drop_duplicates("fivb_id")
+
+        # Players without a FIVB ID stay out of the map, so blank import
+        # rows never match them
+        known = players_df[players_df["fivb_id"].str.strip() != ""]
+        fivb_to_player_id = dict(zip(known["fivb_id"][::-1], known["player_id"][::-1]))
+        new_rows = incoming[~incoming["fivb_id"].isin(fivb_to_player_id)]
+
+        if not new_rows.empty:
+            new_players = pd.DataFrame({
+                "player_id": [new_id() for _ in range(len(new_rows))],
+                "first_name": clean_text(new_rows["first_name"]).to_numpy(),
+                "last_name": clean_text(new_rows["last_name"]).to_numpy(),
+                "shirt_name": clean_text(new_rows["shirt_name"]).to_numpy(),
+                "gender": clean_text(new_rows["gender"]).to_numpy(),
+                "fivb_id": new_rows["fivb_id"].to_numpy(),
+                "birth_date": clean_text(new_rows["birth_date"]).to_numpy(),
+                "nationality": clean_text(new_rows["nationality"]).to_numpy(),
+                "photo_file": "",
+            })
+            players_df = pd.concat([players_df, new_players], ignore_index=True)
+            fivb_to_player_id.update(zip(new_players["fivb_id"], new_players["player_id"]))
+
+        # Rows whose FIVB ID maps to a player, built column by column
+        player_ids = df["fivb_id"].map(fivb_to_player_id)
+        matched = df[player_ids.notna()]
+
+        if not matched.empty:
+            new_results_df = pd.DataFrame({
+                "result_id": [new_id() for _ in range(len(matched))],
+                "player_id": player_ids[player_ids.notna()].to_numpy(),
+                "season": matched["season"].fillna("").astype(str).to_numpy(),
+                "date": matched["date"].to_numpy(),
+                "event_type": clean_text(matched["event_type"]).to_numpy(),
+                "tournament_name": clean_text(matched["tournament_name"]).to_numpy(),
+                "teammate": clean_text(matched["teammate"]).to_numpy(),
+                "points": matched["points"].astype(float).to_numpy(),
+                "rank": matched["rank"].astype(int).to_numpy(),
+                "prize_money": matched["prize_money"].astype(float).to_numpy(),
+            })
             results_df = pd.concat([results_df, new_results_df], ignore_index=True)
-            save_results(results_df)
-            st.success(f"Imported {len(new_results_list)} results and updated players ✅")
+            # players.csv + results.csv as one commit on GitHub
+            save_data(
+                players_df=players_df,
+                results_df=results_df,
+                message="Import results from Excel",
+            )
+            st.success(f"Imported {len(new_results_df)} results and updated players ✅")
         else:
+            save_players(players_df)
             st.info("No results to import (no valid FIVB IDs found).")
 
 
@@ -847,22 +1383,21 @@ Players will be created or matched using **FIVB ID**.
 def page_player_search():
     st.title("🔎 Player Search & Profile")
 
-    players_df = load_players()
-    results_df = load_results()
+    players_df, results_df = load_data()
 
     if players_df.empty:
         st.info("No players yet. Please add players first.")
         return
 
-    players_df["display"] = players_df.apply(player_display_name, axis=1)
-    players_df = players_df.sort_values("display")
+    picker = player_picker_cache(players_df)
+    display_to_id = picker["display_to_id"]
 
     selected = st.selectbox(
         "Select player",
-        players_df["display"].tolist(),
+        picker["display_options"],
     )
 
-    row = players_df[players_df["display"] == selected].iloc[0]
+    row = get_player_by_id(players_df, display_to_id[selected])
     player_id = row["player_id"]
 
     col1, col2 = st.columns([2, 1])
@@ -878,25 +1413,21 @@ def page_player_search():
             photo_rel = row["photo_file"]
             local_path = os.path.join(DATA_DIR, photo_rel)
             if USE_GITHUB:
-                content, _ = github_get_file(local_path)
+                content = github_photo(local_path)
                 if content is not None:
                     st.image(content, caption="Photo ID", use_container_width=True)
                 else:
                     st.caption("Photo path saved but file not found in GitHub.")
             else:
                 if os.path.exists(local_path):
-                    st.image(local_path, caption="Photo ID", use_container_width=True)
+                    content = local_photo(local_path, os.path.getmtime(local_path))
+                    st.image(content, caption="Photo ID", use_container_width=True)
                 else:
                     st.caption("Photo path saved but file not found.")
 
     st.markdown("### Results history")
-    player_results = results_df[results_df["player_id"] == player_id]
-    if player_results.empty:
-        st.info("No results stored for this player yet.")
-    else:
-        display_cols = [c for c in player_results.columns if c not in ["result_id", "player_id"]]
-        player_results = player_results.sort_values("date", ascending=False)
-        st.dataframe(player_results[display_cols].reset_index(drop=True), use_container_width=True)
+    history = newest_first(player_results(results_df, player_id))
+    show_results_table(history, "No results stored for this player yet.")
 
 
 # -------------------------
@@ -906,21 +1437,20 @@ def page_player_search():
 def page_ranking_calculator():
     st.title("📊 Ranking Calculator (per player)")
 
-    players_df = load_players()
-    results_df = load_results()
+    players_df, results_df = load_data()
 
     if players_df.empty:
         st.info("No players yet. Please add/import players first.")
         return
 
-    players_df["display"] = players_df.apply(player_display_name, axis=1)
-    players_df = players_df.sort_values("display")
+    picker = player_picker_cache(players_df)
+    display_to_id = picker["display_to_id"]
 
     selected = st.selectbox(
         "Select player",
-        players_df["display"].tolist(),
+        picker["display_options"],
     )
-    player_row = players_df[players_df["display"] == selected].iloc[0]
+    player_row = get_player_by_id(players_df, display_to_id[selected])
     player_id = player_row["player_id"]
 
     st.markdown(f"### Selected player: **{player_row['first_name']} {player_row['last_name']}**")
@@ -969,20 +1499,11 @@ def page_ranking_calculator():
         st.metric("FIVB side (4 best)", f"{result['bucket2_points']:.2f}")
 
     st.markdown("### Selected results (used in sum)")
-    sr = result["selected_results"].copy()
-    if not sr.empty:
-        sr_display_cols = [c for c in sr.columns if c not in ["result_id", "player_id"]]
-        st.dataframe(sr[sr_display_cols].reset_index(drop=True), use_container_width=True)
-    else:
-        st.info("No selected results in this period.")
+    show_results_table(result["selected_results"], "No selected results in this period.")
 
     st.markdown("### All results within the period")
-    wr = result["window_results"].copy()
-    if not wr.empty:
-        wr_display_cols = [c for c in wr.columns if c not in ["result_id", "player_id"]]
-        st.dataframe(wr[wr_display_cols].reset_index(drop=True), use_container_width=True)
-    else:
-        st.info("No results within this period.")
+    # Newest first, so a capped table keeps the most recent results
+    show_results_table(newest_first(result["window_results"]), "No results within this period.")
 
 
 # -------------------------
@@ -992,27 +1513,26 @@ def page_ranking_calculator():
 def page_team_combiner():
     st.title("👥 Team Combiner (2 players)")
 
-    players_df = load_players()
-    results_df = load_results()
+    players_df, results_df = load_data()
 
     if len(players_df) < 2:
         st.info("Need at least 2 players in the database.")
         return
 
-    players_df["display"] = players_df.apply(player_display_name, axis=1)
-    players_df = players_df.sort_values("display")
+    picker = player_picker_cache(players_df)
+    display_to_id = picker["display_to_id"]
 
     col1, col2 = st.columns(2)
     with col1:
         p1_label = st.selectbox(
             "Player A",
-            players_df["display"].tolist(),
+            picker["display_options"],
             key="team_player_a",
         )
     with col2:
         p2_label = st.selectbox(
             "Player B",
-            players_df["display"].tolist(),
+            picker["display_options"],
             key="team_player_b",
         )
 
@@ -1020,12 +1540,12 @@ def page_team_combiner():
         st.error("Please choose two different players.")
         return
 
-    p1_row = players_df[players_df["display"] == p1_label].iloc[0]
-    p2_row = players_df[players_df["display"] == p2_label].iloc[0]
+    p1_row = get_player_by_id(players_df, display_to_id[p1_label])
+    p2_row = get_player_by_id(players_df, display_to_id[p2_label])
 
     st.markdown(
-        f"### Selected Team:\n- **A:** {p1_row['first_name']} {p1_row['last_name']}\n"
-        f"- **B:** {p2_row['first_name']} {p2_row['last_name']}"
+        f"### Selected Team:\n- **A:** {p1_row['full_name']}\n"
+        f"- **B:** {p2_row['full_name']}"
     )
 
     mode = st.radio(
@@ -1066,20 +1586,10 @@ def page_team_combiner():
         st.metric("Team combined", f"{team_total:.2f}")
 
     st.markdown("#### Player A – selected results")
-    sr1 = res1["selected_results"].copy()
-    if not sr1.empty:
-        cols1 = [c for c in sr1.columns if c not in ["result_id", "player_id"]]
-        st.dataframe(sr1[cols1].reset_index(drop=True), use_container_width=True)
-    else:
-        st.info("No selected results for Player A in this period.")
+    show_results_table(res1["selected_results"], "No selected results for Player A in this period.")
 
     st.markdown("#### Player B – selected results")
-    sr2 = res2["selected_results"].copy()
-    if not sr2.empty:
-        cols2 = [c for c in sr2.columns if c not in ["result_id", "player_id"]]
-        st.dataframe(sr2[cols2].reset_index(drop=True), use_container_width=True)
-    else:
-        st.info("No selected results for Player B in this period.")
+    show_results_table(res2["selected_results"], "No selected results for Player B in this period.")
 
 
 # -------------------------
@@ -1089,15 +1599,14 @@ def page_team_combiner():
 def page_multi_team_report():
     st.title("📑 Multi-Team Report (up to 24 teams)")
 
-    players_df = load_players()
-    results_df = load_results()
+    players_df, results_df = load_data()
 
     if len(players_df) < 2:
         st.info("Need at least 2 players in the database.")
         return
 
-    players_df["display"] = players_df.apply(player_display_name, axis=1)
-    players_df = players_df.sort_values("display")
+    picker = player_picker_cache(players_df)
+    display_to_id = picker["display_to_id"]
 
     st.markdown("Select up to **24 teams** and generate a ranking report in Excel.")
 
@@ -1139,13 +1648,13 @@ def page_multi_team_report():
         with c1:
             p1_label = st.selectbox(
                 f"Player A – Team {i+1}",
-                ["(None)"] + players_df["display"].tolist(),
+                ["(None)"] + picker["display_options"],
                 key=f"multi_p1_{i}",
             )
         with c2:
             p2_label = st.selectbox(
                 f"Player B – Team {i+1}",
-                ["(None)"] + players_df["display"].tolist(),
+                ["(None)"] + picker["display_options"],
                 key=f"multi_p2_{i}",
             )
 
@@ -1155,8 +1664,8 @@ def page_multi_team_report():
             st.warning(f"Team {i+1}: Player A and B must be different. This team will be ignored.")
             continue
 
-        p1_row = players_df[players_df["display"] == p1_label].iloc[0]
-        p2_row = players_df[players_df["display"] == p2_label].iloc[0]
+        p1_row = get_player_by_id(players_df, display_to_id[p1_label])
+        p2_row = get_player_by_id(players_df, display_to_id[p2_label])
 
         teams.append((i+1, p1_row, p2_row))
 
@@ -1215,99 +1724,79 @@ def page_multi_team_report():
         df_teams = df_teams.sort_values("Team Total Points", ascending=False).reset_index(drop=True)
         df_teams.insert(0, "Position", range(1, len(df_teams) + 1))
 
-        # Create Excel in memory
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="openpyxl") as writer:
-            # TAB 1: Entry List
-            sheet_name1 = "Entry List"
-            df_teams.to_excel(writer, sheet_name=sheet_name1, index=False, startrow=4)
-
-            wb = writer.book
-            ws1 = wb[sheet_name1]
-
-            # Header rows for logos & text
-            ws1["A1"] = ""  # left logo placeholder
-            ws1["I1"] = ""  # right logo placeholder
-
-            ws1["C1"] = competition_name
-            ws1["C2"] = competition_date.isoformat()
-            ws1["C3"] = f"Confirmed Entry List ({len(df_teams)} Teams)"
-
-            # TAB 2: Breakdown
-            sheet_name2 = "Breakdown"
-            ws2 = wb.create_sheet(title=sheet_name2)
-
-            row_idx = 1
-            for pid, (prow, pres) in unique_players.items():
-                name = f"{prow['first_name']} {prow['last_name']}"
-                nat = prow["nationality"]
-                gender = prow["gender"]
-
-                # Spacer row
-                if row_idx > 1:
-                    row_idx += 1
-
-                ws2.cell(row=row_idx, column=1, value=f"{name} ({nat}, {gender})")
-                row_idx += 1
-
-                selected = pres["selected_results"].copy()
-                if selected.empty:
-                    ws2.cell(row=row_idx, column=1, value="No selected results in this period.")
-                    row_idx += 1
+        # Create Excel in memory. Write-only workbook: rows are streamed out
+        # in order instead of keeping a cell object per value in memory
+        # openpyxl is only needed here; imported on first use, not at startup
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+
+        # TAB 1: Entry List
+        ws1 = wb.create_sheet(title="Entry List")
+
+        # Header rows for logos & text (A1 / I1: logo placeholders)
+        ws1.append(["", None, competition_name, None, None, None, None, None, ""])
+        ws1.append([None, None, competition_date.isoformat()])
+        ws1.append([None, None, f"Confirmed Entry List ({len(df_teams)} Teams)"])
+        ws1.append([])
+
+        ws1.append(df_teams.columns.tolist())
+        for row in df_teams.itertuples(index=False, name=None):
+            ws1.append(list(row))
+
+        # TAB 2: Breakdown
+        ws2 = wb.create_sheet(title="Breakdown")
+
+        header = ["Season", "Date", "Event Type", "Tournament", "Teammate", "Points", "Rank", "Prize Money"]
+        sides = [
+            # AVC side = AVC + AVC MZ (_bucket 0), FIVB side = FIVB + Other MZ (_bucket 1)
+            ("AVC Side (Best 4)", "(No AVC-side events selected)"),
+            ("FIVB Side (Best 4)", "(No FIVB-side events selected)"),
+        ]
+        for player_no, (prow, pres) in enumerate(unique_players.values()):
+            name = prow["full_name"]
+            nat = prow["nationality"]
+            gender = prow["gender"]
+
+            # Spacer row
+            if player_no:
+                ws2.append([])
+
+            ws2.append([f"{name} ({nat}, {gender})"])
+
+            selected = pres["selected_results"]
+            if selected.empty:
+                ws2.append(["No selected results in this period."])
+                continue
+
+            # Both sides in one pass over the bucket tag
+            by_bucket = dict(tuple(selected.groupby("_bucket", sort=False)))
+            for side_no, (title, empty_text) in enumerate(sides):
+                if side_no:
+                    ws2.append([])
+                ws2.append([title])
+                ws2.append(header)
+
+                side = by_bucket.get(side_no)
+                if side is None:
+                    ws2.append([empty_text])
                     continue
 
-                # AVC side = AVC + AVC MZ
-                avc_side = selected[selected["event_type"].isin(["AVC", "AVC Multi/Zonal"])]
-                fivb_side = selected[selected["event_type"].isin(["FIVB", "Other Multi/Zonal"])]
-
-                # AVC section
-                ws2.cell(row=row_idx, column=1, value="AVC Side (Best 4)")
-                row_idx += 1
-                header = ["Season", "Date", "Event Type", "Tournament", "Teammate", "Points", "Rank", "Prize Money"]
-                for col_idx, h in enumerate(header, start=1):
-                    ws2.cell(row=row_idx, column=col_idx, value=h)
-                row_idx += 1
-
-                if avc_side.empty:
-                    ws2.cell(row=row_idx, column=1, value="(No AVC-side events selected)")
-                    row_idx += 1
-                else:
-                    avc_side = avc_side.sort_values("points", ascending=False)
-                    for _, r in avc_side.iterrows():
-                        ws2.cell(row=row_idx, column=1, value=r["season"])
-                        ws2.cell(row=row_idx, column=2, value=str(r["date"]))
-                        ws2.cell(row=row_idx, column=3, value=r["event_type"])
-                        ws2.cell(row=row_idx, column=4, value=r["tournament_name"])
-                        ws2.cell(row=row_idx, column=5, value=r["teammate"])
-                        ws2.cell(row=row_idx, column=6, value=float(r["points"]))
-                        ws2.cell(row=row_idx, column=7, value=float(r["rank"]))
-                        ws2.cell(row=row_idx, column=8, value=float(r["prize_money"]))
-                        row_idx += 1
-
-                # FIVB section
-                row_idx += 1
-                ws2.cell(row=row_idx, column=1, value="FIVB Side (Best 4)")
-                row_idx += 1
-                for col_idx, h in enumerate(header, start=1):
-                    ws2.cell(row=row_idx, column=col_idx, value=h)
-                row_idx += 1
-
-                if fivb_side.empty:
-                    ws2.cell(row=row_idx, column=1, value="(No FIVB-side events selected)")
-                    row_idx += 1
-                else:
-                    fivb_side = fivb_side.sort_values("points", ascending=False)
-                    for _, r in fivb_side.iterrows():
-                        ws2.cell(row=row_idx, column=1, value=r["season"])
-                        ws2.cell(row=row_idx, column=2, value=str(r["date"]))
-                        ws2.cell(row=row_idx, column=3, value=r["event_type"])
-                        ws2.cell(row=row_idx, column=4, value=r["tournament_name"])
-                        ws2.cell(row=row_idx, column=5, value=r["teammate"])
-                        ws2.cell(row=row_idx, column=6, value=float(r["points"]))
-                        ws2.cell(row=row_idx, column=7, value=float(r["rank"]))
-                        ws2.cell(row=row_idx, column=8, value=float(r["prize_money"]))
-                        row_idx += 1
+                side = side.sort_values("points", ascending=False)
+                for row in zip(
+                    side["season"].tolist(),
+                    side["date"].map(date_text).tolist(),
+                    side["event_type"].tolist(),
+                    side["tournament_name"].tolist(),
+                    side["teammate"].tolist(),
+                    side["points"].astype(float).tolist(),
+                    side["rank"].astype(float).tolist(),
+                    side["prize_money"].astype(float).tolist(),
+                ):
+                    ws2.append(list(row))
 
+        output = BytesIO()
+        wb.save(output)
         output.seek(0)
         st.download_button(
             label="⬇️ Download Excel Report",
@@ -1321,6 +1810,116 @@ def page_multi_team_report():
 # PAGE: AVC RANKINGS (MEN & WOMEN) – FANCY CARDS
 # -------------------------
 
+def event_rows_html(selected):
+    """Rank card table rows (date, event, tournament, points) for selected results."""
+    return "".join(
+        f"""
+<tr>
+    <td style="padding:5px; border:1px solid #ddd;">{date_text(day)}</td>
+    <td style="padding:5px; border:1px solid #ddd;">{escape(str(event_type))}</td>
+    <td style="padding:5px; border:1px solid #ddd;">{escape(str(tournament))}</td>
+    <td style="padding:5px; border:1px solid #ddd;">{points}</td>
+</tr>
+"""
+        for day, event_type, tournament, points in zip(
+            selected["date"],
+            selected["event_type"],
+            selected["tournament_name"],
+            selected["points"].tolist(),
+        )
+    )
+
+
+def rank_card_details(results_df, ref_date, p1, p2):
+    """The expandable part of an AVC ranking card (breakdown + selected
+       events). Memoised per results file version like calculate_player_points(),
+       so reruns (search, category toggle) only join cached HTML.
+    """
+    players = (
+        p1["player_id"], p1["full_name"], shirt_or_name(p1),
+        p2["player_id"], p2["full_name"], shirt_or_name(p2),
+    )
+    version = results_df.attrs.get("version")
+    if version is None:
+        return _rank_card_details(results_df, ref_date, *players)
+    return _cached_rank_card_details(version, ref_date, *players, results_df)
+
+
+@st.cache_data(show_spinner=False, max_entries=2000)
+def _cached_rank_card_details(version, ref_date, pid1, name1, shirt1, pid2, name2, shirt2, _results_df):
+    return _rank_card_details(_results_df, ref_date, pid1, name1, shirt1, pid2, name2, shirt2)
+
+
+def _rank_card_details(results_df, ref_date, pid1, name1, shirt1, pid2, name2, shirt2):
+    r1 = calculate_player_points(results_df, pid1, mode="365", ref_date=ref_date)
+    r2 = calculate_player_points(results_df, pid2, mode="365", ref_date=ref_date)
+    name1 = escape(name1)
+    name2 = escape(name2)
+
+    # Card fragments are collected and joined once (no repeated str +=)
+    parts = [f"""<div class="rank-details">
+
+<h4 style="margin-top:0;">Player Breakdown</h4>
+
+<table style="width:100%; border-collapse:collapse; margin-bottom:20px;">
+<tr style="background:#f3f6ff; font-weight:600;">
+    <td style="padding:6px; border:1px solid #ccc;">Player</td>
+    <td style="padding:6px; border:1px solid #ccc;">Shirt Name</td>
+    <td style="padding:6px; border:1px solid #ccc;">AVC (Best 4)</td>
+    <td style="padding:6px; border:1px solid #ccc;">FIVB (Best 4)</td>
+    <td style="padding:6px; border:1px solid #ccc;">Total</td>
+</tr>
+
+<tr>
+    <td style="padding:6px; border:1px solid #ccc;">{name1}</td>
+    <td style="padding:6px; border:1px solid #ccc;">{escape(shirt1)}</td>
+    <td style="padding:6px; border:1px solid #ccc;">{r1['bucket1_points']:.2f}</td>
+    <td style="padding:6px; border:1px solid #ccc;">{r1['bucket2_points']:.2f}</td>
+    <td style="padding:6px; border:1px solid #ccc; font-weight:700;">{r1['total_points']:.2f}</td>
+</tr>
+
+<tr>
+    <td style="padding:6px; border:1px solid #ccc;">{name2}</td>
+    <td style="padding:6px; border:1px solid #ccc;">{escape(shirt2)}</td>
+    <td style="padding:6px; border:1px solid #ccc;">{r2['bucket1_points']:.2f}</td>
+    <td style="padding:6px; border:1px solid #ccc;">{r2['bucket2_points']:.2f}</td>
+    <td style="padding:6px; border:1px solid #ccc; font-weight:700;">{r2['total_points']:.2f}</td>
+</tr>
+</table>
+
+<h4>Selected Events Used in Calculation</h4>
+
+<b>Player A – {name1}</b><br>
+<table style="width:100%; border-collapse:collapse; margin:8px 0 18px 0;">
+<tr style="background:#eef2ff; font-weight:600;">
+    <td style="padding:5px; border:1px solid #ccc;">Date</td>
+    <td style="padding:5px; border:1px solid #ccc;">Event</td>
+    <td style="padding:5px; border:1px solid #ccc;">Tournament</td>
+    <td style="padding:5px; border:1px solid #ccc;">Points</td>
+</tr>
+"""]
+
+    # Player A events
+    parts.append(event_rows_html(r1["selected_results"]))
+    parts.append("</table>")
+
+    # Player B events
+    parts.append(f"""
+<b>Player B – {name2}</b><br>
+<table style="width:100%; border-collapse:collapse; margin:8px 0 8px 0;">
+<tr style="background:#eef2ff; font-weight:600;">
+    <td style="padding:5px; border:1px solid #ccc;">Date</td>
+    <td style="padding:5px; border:1px solid #ccc;">Event</td>
+    <td style="padding:5px; border:1px solid #ccc;">Tournament</td>
+    <td style="padding:5px; border:1px solid #ccc;">Points</td>
+</tr>
+""")
+
+    parts.append(event_rows_html(r2["selected_results"]))
+    parts.append("</table></div>")
+    return "".join(parts)
+
+
 def page_avc_rankings():
     st.title("🏆 AVC Rankings")
 
@@ -1380,91 +1979,71 @@ def page_avc_rankings():
     Rankings are updated every Monday after AVC-recognized events that grant AVC Ranking Points.
     """)
 
-    players_df = load_players()
-    results_df = load_results()
+    players_df, results_df = load_data()
 
     if players_df.empty or results_df.empty:
         st.info("No players or results available yet.")
         return
 
-    # Mapping: full name → list of IDs
-    name_to_id = {}
-    for _, r in players_df.iterrows():
-        full = f"{r['first_name']} {r['last_name']}".strip()
-        name_to_id.setdefault(full, []).append(r["player_id"])
-
-    # Detect valid pairs from results
-    pair_keys = set()
-    for _, res in results_df.iterrows():
-        pid = res["player_id"]
-        teammate = str(res.get("teammate", "")).strip()
-        if teammate and teammate in name_to_id:
-            tm_id = name_to_id[teammate][0]
-            if tm_id != pid:
-                pair_keys.add(tuple(sorted([pid, tm_id])))
+    # Mapping: full name → ID (first player wins on duplicate names)
+    full_names = players_df["full_name"].str.strip()
+    name_to_id = dict(zip(full_names[::-1], players_df["player_id"][::-1]))
+
+    # Detect valid pairs from results: teammate names → IDs in one map,
+    # each pair keyed as (smaller id, larger id)
+    pid = results_df["player_id"]
+    teammate = clean_text(results_df["teammate"])
+    tm_id = teammate.map(name_to_id)
+    valid = (teammate != "") & tm_id.notna() & (tm_id != pid)
+    pid, tm_id = pid[valid], tm_id[valid]
+    first_is_lower = pid < tm_id
+    pair_keys = list(
+        pd.DataFrame({
+            "a": pid.where(first_is_lower, tm_id),
+            "b": tm_id.where(first_is_lower, pid),
+        })
+        .drop_duplicates()
+        .itertuples(index=False, name=None)
+    )
 
     if not pair_keys:
         st.info("No eligible teams found.")
         return
 
     ref_date = date.today()
-    pts_cache = {}
+    # Totals for ranking in one pass; per-player breakdowns (with the
+    # selected events) are only computed for the cards actually rendered
+    totals = player_totals(results_df, ref_date)
 
-    def get_pts(pid):
-        if pid not in pts_cache:
-            pts_cache[pid] = calculate_player_points(results_df, pid, mode="365", ref_date=ref_date)
-        return pts_cache[pid]
+    # Men / Women toggle
+    tab = st.radio("Select category", ["Men", "Women"])
+    gender = "Male" if tab == "Men" else "Female"
 
-    men_rows, women_rows = [], []
-    men_det, women_det = {}, {}
+    # Only same-gender pairs of the selected category, filtered column-wise
+    # before any per-team work (unknown players map to NaN and drop out)
+    pairs = pd.DataFrame(pair_keys, columns=["a", "b"])
+    gender_of = dict(zip(players_df["player_id"][::-1], players_df["gender"][::-1]))
+    pairs = pairs[(pairs["a"].map(gender_of) == gender) & (pairs["b"].map(gender_of) == gender)]
 
-    # Build rows for men & women rankings
-    for pid_a, pid_b in pair_keys:
+    rows = []
+    details = {}
+    for pid_a, pid_b in pairs.itertuples(index=False, name=None):
         pa = get_player_by_id(players_df, pid_a)
         pb = get_player_by_id(players_df, pid_b)
-        if pa is None or pb is None:
-            continue
 
-        # Only same-gender pairs
-        if pa["gender"] == "Male" and pb["gender"] == "Male":
-            cat = "Men"
-        elif pa["gender"] == "Female" and pb["gender"] == "Female":
-            cat = "Women"
-        else:
-            continue
-
-        r1 = get_pts(pid_a)
-        r2 = get_pts(pid_b)
-        total = r1["total_points"] + r2["total_points"]
+        total = totals.get(pid_a, 0.0) + totals.get(pid_b, 0.0)
 
         nat = pa["nationality"]
         team_name = f"{shirt_or_name(pa)} / {shirt_or_name(pb)}"
         key = f"{pid_a}|{pid_b}"
 
-        row = {
+        rows.append({
             "key": key,
             "Nationality": nat,
             "Team Name": team_name,
             "Total": total,
-        }
-        data = {"p1": pa, "p2": pb, "r1": r1, "r2": r2}
-
-        if cat == "Men":
-            men_rows.append(row)
-            men_det[key] = data
-        else:
-            women_rows.append(row)
-            women_det[key] = data
-
-    # Men / Women toggle
-    tab = st.radio("Select category", ["Men", "Women"])
-
-    if tab == "Men":
-        rows = men_rows
-        details = men_det
-    else:
-        rows = women_rows
-        details = women_det
+        })
+        details[key] = {"p1": pa, "p2": pb}
 
     if not rows:
         st.info("No teams in this category.")
@@ -1508,109 +2087,39 @@ def page_avc_rankings():
         key = row["key"]
         d = details[key]
         p1, p2 = d["p1"], d["p2"]
-        r1, r2 = d["r1"], d["r2"]
 
         rank = row["Rank"]
-        nat = row["Nationality"]
-        team_name = row["Team Name"]
+        nat = escape(str(row["Nationality"]))
+        team_name = escape(row["Team Name"])
         total = row["Total"]
 
-        # Start HTML card
-        html = f"""<details class="rank-card">
+        parts = [f"""<details class="rank-card">
 <summary class="rank-summary">
 <div class="rank-num">{rank}</div>
 <div class="rank-nat">{nat}</div>
 <div class="rank-team">{team_name}</div>
 <div class="rank-pts">{total:.2f} pts</div>
 </summary>
-<div class="rank-details">
-
-<h4 style="margin-top:0;">Player Breakdown</h4>
-
-<table style="width:100%; border-collapse:collapse; margin-bottom:20px;">
-<tr style="background:#f3f6ff; font-weight:600;">
-    <td style="padding:6px; border:1px solid #ccc;">Player</td>
-    <td style="padding:6px; border:1px solid #ccc;">Shirt Name</td>
-    <td style="padding:6px; border:1px solid #ccc;">AVC (Best 4)</td>
-    <td style="padding:6px; border:1px solid #ccc;">FIVB (Best 4)</td>
-    <td style="padding:6px; border:1px solid #ccc;">Total</td>
-</tr>
-
-<tr>
-    <td style="padding:6px; border:1px solid #ccc;">{p1['first_name']} {p1['last_name']}</td>
-    <td style="padding:6px; border:1px solid #ccc;">{shirt_or_name(p1)}</td>
-    <td style="padding:6px; border:1px solid #ccc;">{r1['bucket1_points']:.2f}</td>
-    <td style="padding:6px; border:1px solid #ccc;">{r1['bucket2_points']:.2f}</td>
-    <td style="padding:6px; border:1px solid #ccc; font-weight:700;">{r1['total_points']:.2f}</td>
-</tr>
+""", rank_card_details(results_df, ref_date, p1, p2), "</details>"]
 
-<tr>
-    <td style="padding:6px; border:1px solid #ccc;">{p2['first_name']} {p2['last_name']}</td>
-    <td style="padding:6px; border:1px solid #ccc;">{shirt_or_name(p2)}</td>
-    <td style="padding:6px; border:1px solid #ccc;">{r2['bucket1_points']:.2f}</td>
-    <td style="padding:6px; border:1px solid #ccc;">{r2['bucket2_points']:.2f}</td>
-    <td style="padding:6px; border:1px solid #ccc; font-weight:700;">{r2['total_points']:.2f}</td>
-</tr>
-</table>
-
-<h4>Selected Events Used in Calculation</h4>
-
-<b>Player A – {p1['first_name']} {p1['last_name']}</b><br>
-<table style="width:100%; border-collapse:collapse; margin:8px 0 18px 0;">
-<tr style="background:#eef2ff; font-weight:600;">
-    <td style="padding:5px; border:1px solid #ccc;">Date</td>
-    <td style="padding:5px; border:1px solid #ccc;">Event</td>
-    <td style="padding:5px; border:1px solid #ccc;">Tournament</td>
-    <td style="padding:5px; border:1px solid #ccc;">Points</td>
-</tr>
-"""
-
-        # Player A events
-        sel1 = r1["selected_results"]
-        for _, ev in sel1.iterrows():
-            html += f"""
-<tr>
-    <td style="padding:5px; border:1px solid #ddd;">{ev['date']}</td>
-    <td style="padding:5px; border:1px solid #ddd;">{ev['event_type']}</td>
-    <td style="padding:5px; border:1px solid #ddd;">{ev['tournament_name']}</td>
-    <td style="padding:5px; border:1px solid #ddd;">{ev['points']}</td>
-</tr>
-"""
-
-        html += "</table>"
-
-        # Player B events
-        html += f"""
-<b>Player B – {p2['first_name']} {p2['last_name']}</b><br>
-<table style="width:100%; border-collapse:collapse; margin:8px 0 8px 0;">
-<tr style="background:#eef2ff; font-weight:600;">
-    <td style="padding:5px; border:1px solid #ccc;">Date</td>
-    <td style="padding:5px; border:1px solid #ccc;">Event</td>
-    <td style="padding:5px; border:1px solid #ccc;">Tournament</td>
-    <td style="padding:5px; border:1px solid #ccc;">Points</td>
-</tr>
-"""
-
-        sel2 = r2["selected_results"]
-        for _, ev in sel2.iterrows():
-            html += f"""
-<tr>
-    <td style="padding:5px; border:1px solid #ddd;">{ev['date']}</td>
-    <td style="padding:5px; border:1px solid #ddd;">{ev['event_type']}</td>
-    <td style="padding:5px; border:1px solid #ddd;">{ev['tournament_name']}</td>
-    <td style="padding:5px; border:1px solid #ddd;">{ev['points']}</td>
-</tr>
-"""
-
-        html += "</table></div></details>"
-
-        st.markdown(html, unsafe_allow_html=True)
+        st.markdown("".join(parts), unsafe_allow_html=True)
 
 
 # -------------------------
 # MAIN SIDEBAR / ROUTER
 # -------------------------
 
+PAGES = {
+    "Add / Edit Player": page_add_edit_player,
+    "Import from Excel": page_import_excel,
+    "Player Search": page_player_search,
+    "Ranking Calculator": page_ranking_calculator,
+    "Team Combiner (Single)": page_team_combiner,
+    "Multi-Team Report": page_multi_team_report,
+    "AVC Rankings": page_avc_rankings,
+}
+
+
 def main():
     st.sidebar.title("🏐 Player Database")
     if USE_GITHUB:
@@ -1618,33 +2127,8 @@ def main():
     else:
         st.sidebar.warning("GitHub storage: OFF (local / ephemeral on Streamlit Cloud)")
 
-    page = st.sidebar.radio(
-        "Go to",
-        [
-            "Add / Edit Player",
-            "Import from Excel",
-            "Player Search",
-            "Ranking Calculator",
-            "Team Combiner (Single)",
-            "Multi-Team Report",
-            "AVC Rankings",
-        ],
-    )
-
-    if page == "Add / Edit Player":
-        page_add_edit_player()
-    elif page == "Import from Excel":
-        page_import_excel()
-    elif page == "Player Search":
-        page_player_search()
-    elif page == "Ranking Calculator":
-        page_ranking_calculator()
-    elif page == "Team Combiner (Single)":
-        page_team_combiner()
-    elif page == "Multi-Team Report":
-        page_multi_team_report()
-    elif page == "AVC Rankings":
-        page_avc_rankings()
+    page = st.sidebar.radio("Go to", list(PAGES))
+    PAGES[page]()
 
 
 if __name__ == "__main__":
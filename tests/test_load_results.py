@@ -0,0 +1,68 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from datetime import date
+
+import pandas as pd
+
+APP_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "player_database_app.py")
+
+HEADER = "result_id,player_id,season,date,event_type,tournament_name,teammate,points,rank,prize_money\n"
+
+
+def load_app():
+    spec = importlib.util.spec_from_file_location("player_database_app", APP_PATH)
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    return app
+
+
+class LoadResultsTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = load_app()
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        os.makedirs("data")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_blank_rank_loads_as_nan(self):
+        with open("data/results.csv", "w", encoding="utf-8") as f:
+            f.write(HEADER)
+            f.write("r1,p1,2025,2025-01-01,AVC,Open A,,50,,0\n")
+            f.write("r2,p1,2025,2025-02-01,FIVB,Open B,,40,3,\n")
+
+        df = self.app.load_results()
+
+        self.assertEqual(len(df), 2)
+        self.assertTrue(pd.isna(df["rank"].iloc[0]))
+        self.assertEqual(df["rank"].iloc[1], 3)
+        self.assertTrue(pd.isna(df["prize_money"].iloc[1]))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["date"]))
+        points = self.app.calculate_player_points(df, "p1", ref_date=date(2025, 6, 1))
+        self.assertEqual(points["total_points"], 90.0)
+
+    def test_first_result_saves_iso_date(self):
+        new_row = pd.DataFrame([{
+            "result_id": "r1", "player_id": "p1", "season": "2025",
+            "date": pd.Timestamp("2025-01-01"), "event_type": "AVC",
+            "tournament_name": "Open A", "teammate": "", "points": 50.0,
+            "rank": 1, "prize_money": 0.0,
+        }])
+
+        self.app.append_results(self.app.load_results(), new_row)
+
+        with open("data/results.csv", encoding="utf-8") as f:
+            saved = f.read().splitlines()
+        self.assertEqual(saved[1].split(",")[3], "2025-01-01")
+
+
+if __name__ == "__main__":
+    unittest.main()